@@ -2,7 +2,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import json
 from datetime import datetime
+from calendar_views import filter_records, show_calendar
 
 # Initialize the event database (in-memory storage for now)
 if "events" not in st.session_state:
@@ -54,7 +56,7 @@ def sort_events_by_date():
 st.title("Event Management System")
 
 # Tabs for different functionalities
-tab1, tab2, tab3, tab4 = st.tabs(["Add Event", "View Events", "Manage Events", "Sort Events"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["Add Event", "View Events", "Manage Events", "Sort Events", "Calendar"])
 
 # Tab 1: Add Event
 with tab1:
@@ -77,6 +79,9 @@ with tab2:
     if st.session_state.events:
         df = pd.DataFrame(st.session_state.events)
         st.dataframe(df)
+        # Session events are lost when the tab closes; the export feeds consolidate.py
+        st.download_button("Export Events", data=json.dumps(st.session_state.events),
+                           file_name="aat_events.json", mime="application/json")
     else:
         st.info("No events found. Add some events first.")
 
@@ -116,4 +121,9 @@ with tab4:
             st.dataframe(sorted_df)
     else:
         st.info("No events to sort. Add some events first.")
+
+# Tab 5: Calendar
+with tab5:
+    st.header("Calendar")
+    show_calendar(lambda start, end: filter_records(st.session_state.events, start, end))
 # streamlit run C:\Users\Ganesh\PycharmProjects\pythonProject\aat.py
@@ -0,0 +1,178 @@
+"""Password hashing and signed session tokens for the event apps.
+
+Passwords are stored as salted scrypt or PBKDF2 hashes with the cost encoded
+in the stored string, so the cost can be raised later and old hashes are
+upgraded on the next successful login. Legacy unsalted SHA-256 hashes are
+still accepted and upgraded the same way.
+
+Hashing runs on a small bounded thread pool (hashlib releases the GIL while
+it works), so a burst of logins queues up there instead of stalling other
+sessions' reruns.
+
+    python auth.py  # Logins per second at each cost setting
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_METHOD = "scrypt"  # "scrypt" or "pbkdf2_sha256"
+SCRYPT_N = 2 ** 14  # scrypt CPU/memory cost, a power of two
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+TOKEN_TTL = 12 * 60 * 60  # Seconds a session token stays valid
+
+# Tokens only need to outlive the Streamlit server process, like session_state
+_SECRET_KEY = secrets.token_bytes(32)
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="auth-hash")
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _default_cost(method):
+    return SCRYPT_N if method == "scrypt" else PBKDF2_ITERATIONS
+
+
+def _derive(password, method, cost, salt):
+    if method == "scrypt":
+        return hashlib.scrypt(password.encode(), salt=salt, n=cost, r=SCRYPT_R, p=SCRYPT_P,
+                              maxmem=256 * SCRYPT_R * (cost + SCRYPT_P + 2))
+    if method == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, cost)
+    raise ValueError(f"Unknown hash method: {method}")
+
+
+def hash_password(password, method=HASH_METHOD, cost=None):
+    """Hash a password as 'method$cost$salt$hash' for secure storage."""
+    cost = cost or _default_cost(method)
+    salt = secrets.token_bytes(16)
+    return f"{method}${cost}${_b64(salt)}${_b64(_derive(password, method, cost, salt))}"
+
+
+def verify_password(password, stored):
+    """Check a password against a stored KDF or legacy SHA-256 hash."""
+    if "$" not in stored:
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored)
+    try:
+        method, cost, salt, expected = stored.split("$")
+        derived = _derive(password, method, int(cost), _unb64(salt))
+    except ValueError:
+        return False  # Malformed or placeholder hash, e.g. an account without a password
+    return hmac.compare_digest(derived, _unb64(expected))
+
+
+def needs_rehash(stored, method=HASH_METHOD, cost=None):
+    """Return True for legacy hashes and hashes made with other settings."""
+    return not stored.startswith(f"{method}${cost or _default_cost(method)}$")
+
+
+# A real hash to verify against for unknown users, so lookups take the same time
+_DUMMY_HASH = hash_password(secrets.token_hex(8))
+
+
+def register_user(db_name, username, password, role=None, method=HASH_METHOD, cost=None):
+    """Register a new user; role is only stored for schemas that have it."""
+    hashed = _executor.submit(hash_password, password, method, cost).result()
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    try:
+        if role is None:
+            cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed))
+        else:
+            cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                           (username, hashed, role))
+        conn.commit()
+    except sqlite3.IntegrityError:
+        return False  # Username already exists
+    finally:
+        conn.close()
+    return True
+
+
+def authenticate(db_name, username, password, with_role=False, method=HASH_METHOD, cost=None):
+    """Check credentials and return (username, role), or None if they are wrong.
+
+    Hashes made with old settings, including legacy SHA-256, are replaced
+    with a fresh hash once the password has been verified.
+    """
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    columns = "password, role" if with_role else "password, NULL"
+    cursor.execute(f"SELECT {columns} FROM users WHERE username = ?", (username,))
+    user = cursor.fetchone()
+    stored, role = user if user else (_DUMMY_HASH, None)
+    if not _executor.submit(verify_password, password, stored).result() or not user:
+        conn.close()
+        return None
+    if needs_rehash(stored, method, cost):
+        upgraded = _executor.submit(hash_password, password, method, cost).result()
+        cursor.execute("UPDATE users SET password = ? WHERE username = ? AND password = ?",
+                       (upgraded, username, stored))
+        conn.commit()
+    conn.close()
+    return username, role
+
+
+def make_session_token(username, role=None, ttl=TOKEN_TTL):
+    """Sign the verified identity so reruns can trust it without the users table."""
+    payload = _b64(json.dumps({"u": username, "r": role, "exp": int(time.time()) + ttl}).encode())
+    signature = _b64(hmac.new(_SECRET_KEY, payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+
+def read_session_token(token):
+    """Return (username, role) from a valid, unexpired token, else None."""
+    if not token or "." not in token:
+        return None
+    payload, signature = token.rsplit(".", 1)
+    expected = _b64(hmac.new(_SECRET_KEY, payload.encode(), hashlib.sha256).digest())
+    if not hmac.compare_digest(signature, expected):
+        return None
+    claims = json.loads(_unb64(payload))
+    if claims["exp"] < time.time():
+        return None
+    return claims["u"], claims["r"]
+
+
+def benchmark_logins(method, cost, logins=64, users=8):
+    """Return logins per second for concurrent logins at the given cost."""
+    with tempfile.TemporaryDirectory() as db_dir:
+        db_name = os.path.join(db_dir, "bench.db")
+        conn = sqlite3.connect(db_name)
+        conn.execute("CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT NOT NULL)")
+        conn.commit()
+        conn.close()
+        for i in range(users):
+            register_user(db_name, f"user{i}", "secret", method=method, cost=cost)
+        # Sessions log in from many script threads; hashing still goes through the pool
+        with ThreadPoolExecutor(max_workers=users) as sessions:
+            start = time.perf_counter()
+            results = list(sessions.map(
+                lambda i: authenticate(db_name, f"user{i % users}", "secret", method=method, cost=cost),
+                range(logins)))
+            elapsed = time.perf_counter() - start
+    assert all(results)
+    return logins / elapsed
+
+
+if __name__ == "__main__":
+    print(f"{HASH_WORKERS} hashing workers")
+    for method, costs in [("scrypt", [2 ** 12, 2 ** 14, 2 ** 15]),
+                          ("pbkdf2_sha256", [100_000, 300_000, 600_000])]:
+        for cost in costs:
+            print(f"{method:<15}{cost:>10}{benchmark_logins(method, cost):>10.1f} logins/s")
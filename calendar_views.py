@@ -0,0 +1,194 @@
+"""Month, week and day calendar views.
+
+Each view loads its visible window with a single Date range query, or a
+filter over aat.py's in-memory list. Events are bucketed into days with
+pandas/NumPy array operations. The previous and next windows are prefetched
+into a small cache in the background, so paging does not wait on the database.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+VIEWS = ["Month", "Week", "Day"]
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+EVENT_COLUMNS = ["ID", "Name", "Description", "Date", "Time", "Location"]
+CACHE_WINDOWS = 9  # A few windows either side of the current one
+CACHE_TTL = 30  # Seconds before a window is reloaded, to pick up other processes' writes
+
+
+def create_calendar_indexes(db_name):
+    """Create the indexes behind the window queries."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_start ON events (Date, Time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_owner_start ON events (username, Date, Time)")
+    conn.commit()
+    conn.close()
+
+
+def window_bounds(view, anchor):
+    """Return the [start, end) dates visible in a view around anchor.
+
+    Month windows cover whole weeks, Monday to Sunday, so they fill a grid.
+    """
+    if view == "Day":
+        return anchor, anchor + timedelta(days=1)
+    if view == "Week":
+        start = anchor - timedelta(days=anchor.weekday())
+        return start, start + timedelta(days=7)
+    first = anchor.replace(day=1)
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    start = first - timedelta(days=first.weekday())
+    end = next_month + timedelta(days=(7 - next_month.weekday()) % 7)
+    return start, end
+
+
+def shift_anchor(view, anchor, step):
+    """Move anchor by step days, weeks or months."""
+    if view == "Day":
+        return anchor + timedelta(days=step)
+    if view == "Week":
+        return anchor + timedelta(weeks=step)
+    month = anchor.year * 12 + anchor.month - 1 + step
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def fetch_window(db_name, start, end, username=None):
+    """Load events with start <= Date < end, optionally for one owner, in one query."""
+    conn = sqlite3.connect(db_name)
+    query = """
+    SELECT e.ID, e.Name, e.Description, e.Date, e.Time, l.Name
+    FROM events AS e JOIN locations AS l ON l.ID = e.location_id
+    WHERE e.Date >= ? AND e.Date < ?
+    """
+    params = [str(start), str(end)]
+    if username is not None:
+        query += "AND e.username = ?"
+        params.append(username)
+    rows = conn.execute(query + " ORDER BY e.Date, e.Time", params).fetchall()
+    conn.close()
+    return pd.DataFrame(rows, columns=EVENT_COLUMNS)
+
+
+def filter_records(records, start, end):
+    """Return the events from an in-memory list (aat.py) with start <= Date < end."""
+    events = pd.DataFrame(records, columns=EVENT_COLUMNS)
+    mask = (events["Date"] >= str(start)) & (events["Date"] < str(end))
+    return events[mask].sort_values(["Date", "Time"])
+
+
+def bucket_by_day(events, start, end):
+    """Lay events out as a grid of weeks (rows) by weekday (columns).
+
+    start must be a Monday and the window a whole number of weeks. Each cell
+    holds the day of the month followed by that day's events.
+    """
+    days = (end - start).days
+    day_index = (pd.to_datetime(events["Date"]) - pd.Timestamp(start)).dt.days.to_numpy()
+    labels = events["Time"].str[:5] + " " + events["Name"]
+    per_day = labels.groupby(day_index).agg("; ".join)
+
+    cells = np.full(days, "", dtype=object)
+    cells[per_day.index.to_numpy()] = per_day.to_numpy()
+    day_numbers = pd.date_range(start, periods=days).day.astype(str).to_numpy(dtype=object)
+    cells = np.where(cells == "", day_numbers, day_numbers + " · " + cells)
+    weeks = pd.date_range(start, periods=days // 7, freq="7D").strftime("%Y-%m-%d")
+    return pd.DataFrame(cells.reshape(-1, 7), index=weeks, columns=WEEKDAYS)
+
+
+class WindowCache:
+    """Small LRU cache of loaded windows that can fill itself in the background.
+
+    Windows expire after ttl seconds, so writes from other processes (the
+    other app on the same database, consolidate.py) show up without a restart.
+    """
+
+    def __init__(self, max_windows=CACHE_WINDOWS, ttl=CACHE_TTL):
+        self.max_windows = max_windows
+        self.ttl = ttl
+        self._windows = OrderedDict()  # key -> (Future of the window's events, load start time)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="calendar-prefetch")
+
+    def _future(self, key, load):
+        with self._lock:
+            cached = self._windows.get(key)
+            now = time.monotonic()
+            if (cached is None or now - cached[1] > self.ttl
+                    or (cached[0].done() and cached[0].exception() is not None)):
+                self._windows[key] = (self._executor.submit(load), now)
+                while len(self._windows) > self.max_windows:
+                    self._windows.popitem(last=False)
+            self._windows.move_to_end(key)
+            return self._windows[key][0]
+
+    def get(self, key, load):
+        """Return the window for key, loading it now if it isn't cached."""
+        future = self._future(key, load)
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                if key in self._windows and self._windows[key][0] is future:
+                    del self._windows[key]  # Don't cache the failure
+            raise
+
+    def prefetch(self, key, load):
+        """Start loading the window for key in the background."""
+        self._future(key, load)
+
+    def clear(self):
+        """Drop every cached window, e.g. after events change."""
+        with self._lock:
+            self._windows.clear()
+
+
+def show_calendar(load_window, cache=None, cache_key=None):
+    """Render the calendar tab.
+
+    load_window(start, end) returns the window's events as a DataFrame. With
+    a cache, windows are stored under (cache_key, start, end) and the
+    neighboring windows are prefetched.
+    """
+    if "calendar_anchor" not in st.session_state:
+        st.session_state.calendar_anchor = date.today()
+
+    view = st.radio("Calendar View", VIEWS, horizontal=True)
+    previous, today, following = st.columns(3)
+    if previous.button("Previous"):
+        st.session_state.calendar_anchor = shift_anchor(view, st.session_state.calendar_anchor, -1)
+    if today.button("Today"):
+        st.session_state.calendar_anchor = date.today()
+    if following.button("Next"):
+        st.session_state.calendar_anchor = shift_anchor(view, st.session_state.calendar_anchor, 1)
+    anchor = st.session_state.calendar_anchor
+
+    start, end = window_bounds(view, anchor)
+    if cache is None:
+        events = load_window(start, end)
+    else:
+        events = cache.get((cache_key, start, end), lambda: load_window(start, end))
+        for step in (-1, 1):
+            near_start, near_end = window_bounds(view, shift_anchor(view, anchor, step))
+            cache.prefetch((cache_key, near_start, near_end),
+                           lambda s=near_start, e=near_end: load_window(s, e))
+
+    if view == "Month":
+        st.subheader(anchor.strftime("%B %Y"))
+        st.dataframe(bucket_by_day(events, start, end))
+    elif view == "Week":
+        st.subheader(f"Week of {start:%d %b %Y}")
+        st.dataframe(bucket_by_day(events, start, end))
+    else:
+        st.subheader(f"{anchor:%A %d %B %Y}")
+    if events.empty:
+        st.info("No events in this period.")
+    else:
+        st.dataframe(events, hide_index=True)
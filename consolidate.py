@@ -0,0 +1,298 @@
+"""Consolidate the event stores into one database.
+
+Reads any mix of:
+
+- events.db from eventmgmsyst.py (events only, no users)
+- event_management.db from ems.py or eventmgmnew.py (with or without the
+  role column, and with free-text or interned locations)
+- JSON exports of aat.py's in-memory session list ("Export Events" button)
+
+and writes them into a single unified database. That database uses the ems.py
+schema, so ems.py can open it directly.
+
+Worker processes read each source in ID-range chunks and hash the rows, while
+the main process writes one transaction per chunk. Events whose name,
+description, date, time and location match are merged into one event. Events
+with no known owner go to a default owner. Each SQLite source keeps an ID
+watermark, so later runs copy only rows added since the last sync; pass --full
+to re-read everything and pick up edits. aat.py IDs restart every session, so
+its exports are always read in full and deduplicated by content.
+
+    python consolidate.py unified.db --sqlite event_management.db events.db --aat aat_events.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from multiprocessing import Pool
+
+from locations import create_locations_table, normalize_location
+
+CHUNK_SIZE = 50_000  # Source IDs per read task and per write transaction
+DEFAULT_OWNER = "admin"
+NO_PASSWORD = "!"  # Never matches a hash, so the default owner can't log in until reset
+
+
+def create_unified_tables(db_name):
+    """Create the unified schema: the ems.py tables plus sync bookkeeping."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL
+    )
+    """)
+    # content_hash is NULL for events added later through the apps
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS events (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        Name TEXT NOT NULL,
+        Description TEXT NOT NULL,
+        Date TEXT NOT NULL,
+        Time TEXT NOT NULL,
+        location_id INTEGER NOT NULL,
+        username TEXT NOT NULL,
+        content_hash TEXT UNIQUE,
+        FOREIGN KEY (location_id) REFERENCES locations (ID),
+        FOREIGN KEY (username) REFERENCES users (username)
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_location_start ON events (location_id, Date, Time)")
+    # Which source row each unified event came from
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS event_sources (
+        source TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        event_id INTEGER NOT NULL REFERENCES events (ID),
+        PRIMARY KEY (source, source_id)
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_sources_event ON event_sources (event_id)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sync_state (
+        source TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL
+    )
+    """)
+    conn.commit()
+    conn.close()
+    create_locations_table(db_name)
+
+
+def content_hash(name, description, date, time, location):
+    """Hash the fields that identify an event; the owner is deliberately left out."""
+    _, location_key = normalize_location(location)
+    return hashlib.sha1("\x1f".join([name, description, date, time, location_key]).encode()).hexdigest()
+
+
+def describe_source(path):
+    """Inspect a SQLite store and return how to read its users and events."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    tables = {row[0] for row in cursor.fetchall()}
+    cursor.execute("PRAGMA table_info(events)")
+    event_columns = {row[1] for row in cursor.fetchall()}
+    user_columns = set()
+    if "users" in tables:
+        cursor.execute("PRAGMA table_info(users)")
+        user_columns = {row[1] for row in cursor.fetchall()}
+    conn.close()
+    return {
+        "has_users": "users" in tables,
+        "has_role": "role" in user_columns,
+        "has_owner": "username" in event_columns,
+        "interned": "Location" not in event_columns,
+    }
+
+
+def _events_query(layout):
+    location = "l.Name" if layout["interned"] else "e.Location"
+    join = "JOIN locations AS l ON l.ID = e.location_id" if layout["interned"] else ""
+    owner = "e.username" if layout["has_owner"] else "NULL"
+    return f"""
+    SELECT e.ID, e.Name, e.Description, e.Date, e.Time, {location}, {owner}
+    FROM events AS e {join}
+    WHERE e.ID > ? AND e.ID <= ?
+    ORDER BY e.ID
+    """
+
+
+def read_chunk(task):
+    """Read one chunk of a source in a worker process and hash its rows."""
+    source, path, layout, low, high, records = task
+    if records is None:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        rows = conn.execute(_events_query(layout), (low, high)).fetchall()
+        conn.close()
+    else:
+        rows = [(r["ID"], r["Name"], r["Description"], r["Date"], r["Time"], r["Location"], None)
+                for r in records]
+    return source, high, [row + (content_hash(*row[1:6]),) for row in rows]
+
+
+def plan_sqlite_source(path, target, full, chunk_size):
+    """Return read tasks covering the rows of a SQLite store past its watermark."""
+    source = os.path.abspath(path)
+    layout = describe_source(path)
+    conn = sqlite3.connect(target)
+    row = conn.execute("SELECT last_id FROM sync_state WHERE source = ?", (source,)).fetchone()
+    conn.close()
+    watermark = 0 if full or row is None else row[0]
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    max_id = conn.execute("SELECT MAX(ID) FROM events").fetchone()[0] or 0
+    conn.close()
+    return [(source, path, layout, low, min(low + chunk_size, max_id), None)
+            for low in range(watermark, max_id, chunk_size)]
+
+
+def plan_aat_export(path, chunk_size):
+    """Return read tasks for a JSON export of aat.py's session events."""
+    with open(path, encoding="utf-8") as export:
+        records = json.load(export)
+    source = "aat:" + os.path.abspath(path)
+    return [(source, path, None, None, None, records[i:i + chunk_size])
+            for i in range(0, len(records), chunk_size)]
+
+
+def copy_users(paths, target, default_owner):
+    """Copy user accounts from every store that has them; the first store wins."""
+    conn = sqlite3.connect(target)
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, 'Admin')",
+                     (default_owner, NO_PASSWORD))
+        for path in paths:
+            layout = describe_source(path)
+            if not layout["has_users"]:
+                continue
+            source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            role = "role" if layout["has_role"] else "'User'"
+            users = source.execute(f"SELECT username, password, {role} FROM users").fetchall()
+            source.close()
+            conn.executemany("INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)", users)
+    known = {row[0] for row in conn.execute("SELECT username FROM users")}
+    conn.close()
+    return known
+
+
+class UnifiedWriter:
+    """Write hashed source rows into the unified database, one transaction per chunk."""
+
+    def __init__(self, target, known_users, default_owner):
+        self.conn = sqlite3.connect(target)
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.known_users = known_users
+        self.default_owner = default_owner
+        self.location_ids = {}
+        self.inserted = self.merged = self.updated = 0
+
+    def _location_id(self, cursor, name):
+        display, key = normalize_location(name)
+        if key not in self.location_ids:
+            cursor.execute("INSERT OR IGNORE INTO locations (Name, name_key) VALUES (?, ?)", (display, key))
+            cursor.execute("SELECT ID FROM locations WHERE name_key = ?", (key,))
+            self.location_ids[key] = cursor.fetchone()[0]
+        return self.location_ids[key]
+
+    def _only_source(self, cursor, event_id):
+        cursor.execute("SELECT COUNT(*) FROM event_sources WHERE event_id = ?", (event_id,))
+        return cursor.fetchone()[0] == 1
+
+    def write_chunk(self, source, high, rows):
+        """Upsert one chunk and advance the source's watermark in the same transaction."""
+        if not rows and high is None:
+            return
+        cursor = self.conn.cursor()
+        with self.conn:
+            mapped = {}
+            # aat.py IDs restart every session, so its rows are matched by content only
+            if rows and high is not None:
+                cursor.execute("SELECT source_id, event_id FROM event_sources "
+                               "WHERE source = ? AND source_id BETWEEN ? AND ?",
+                               (source, min(r[0] for r in rows), max(r[0] for r in rows)))
+                mapped = dict(cursor.fetchall())
+            for source_id, name, description, date, time, location, owner, digest in rows:
+                cursor.execute("SELECT ID FROM events WHERE content_hash = ?", (digest,))
+                existing = cursor.fetchone()
+                existing = existing[0] if existing else None
+                event_id = mapped.get(source_id)
+                if event_id is not None and existing == event_id:
+                    continue  # Unchanged since the last sync
+                if existing is None:
+                    if event_id is not None and self._only_source(cursor, event_id):
+                        # The source row was edited; carry the edit over to its event
+                        cursor.execute("""
+                        UPDATE events
+                        SET Name = ?, Description = ?, Date = ?, Time = ?, location_id = ?, content_hash = ?
+                        WHERE ID = ?
+                        """, (name, description, date, time, self._location_id(cursor, location), digest, event_id))
+                        self.updated += 1
+                        continue
+                    # New, or an edit to an event other stores share, which keep the old version
+                    if owner not in self.known_users:
+                        owner = self.default_owner
+                    cursor.execute("""
+                    INSERT INTO events (Name, Description, Date, Time, location_id, username, content_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, (name, description, date, time, self._location_id(cursor, location), owner, digest))
+                    existing = cursor.lastrowid
+                    self.inserted += 1
+                else:
+                    self.merged += 1
+                cursor.execute("INSERT OR REPLACE INTO event_sources (source, source_id, event_id) VALUES (?, ?, ?)",
+                               (source, source_id, existing))
+            if high is not None:
+                cursor.execute("INSERT OR REPLACE INTO sync_state (source, last_id) VALUES (?, ?)", (source, high))
+
+    def close(self):
+        self.conn.close()
+
+
+def consolidate(target, sqlite_paths=(), aat_paths=(), default_owner=DEFAULT_OWNER,
+                full=False, workers=None, chunk_size=CHUNK_SIZE):
+    """Merge the given stores into target and return (inserted, merged, updated) counts."""
+    create_unified_tables(target)
+    known_users = copy_users(sqlite_paths, target, default_owner)
+
+    # Stores with owners come first, so a duplicate keeps its real owner
+    ordered = sorted(sqlite_paths, key=lambda path: not describe_source(path)["has_owner"])
+    tasks = [task for path in ordered for task in plan_sqlite_source(path, target, full, chunk_size)]
+    tasks += [task for path in aat_paths for task in plan_aat_export(path, chunk_size)]
+
+    writer = UnifiedWriter(target, known_users, default_owner)
+    try:
+        with Pool(workers) as pool:
+            # imap keeps task order, so each source's watermark only moves forward
+            for source, high, rows in pool.imap(read_chunk, tasks):
+                writer.write_chunk(source, high, rows)
+    finally:
+        writer.close()
+    return writer.inserted, writer.merged, writer.updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidate the event stores into one database.")
+    parser.add_argument("target", help="Unified database to create or update")
+    parser.add_argument("--sqlite", nargs="*", default=[], help="events.db / event_management.db files")
+    parser.add_argument("--aat", nargs="*", default=[], help="JSON exports from aat.py")
+    parser.add_argument("--default-owner", default=DEFAULT_OWNER, help="Owner for events without one")
+    parser.add_argument("--full", action="store_true", help="Ignore watermarks and re-read every row")
+    parser.add_argument("--workers", type=int, default=None, help="Reader processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Source IDs per chunk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    inserted, merged, updated = consolidate(args.target, args.sqlite, args.aat, args.default_owner,
+                                            args.full, args.workers, args.chunk_size)
+    print(f"{inserted} inserted, {merged} merged as duplicates, {updated} updated "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
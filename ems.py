@@ -1,7 +1,11 @@
 import streamlit as st
 import sqlite3
-from datetime import datetime
-import hashlib
+from datetime import datetime, timedelta
+import auth
+from reminders import ReminderScheduler, OutboxTableSink
+from locations import (create_locations_table, find_location, get_location_events, intern_location,
+                       migrate_event_locations, search_locations)
+from calendar_views import WindowCache, create_calendar_indexes, fetch_window, show_calendar
 import pandas as pd
 
 # Database setup
@@ -27,67 +31,55 @@ def create_tables():
         Description TEXT NOT NULL,
         Date TEXT NOT NULL,
         Time TEXT NOT NULL,
-        Location TEXT NOT NULL,
+        location_id INTEGER NOT NULL,
         username TEXT NOT NULL,
+        FOREIGN KEY (location_id) REFERENCES locations (ID),
         FOREIGN KEY (username) REFERENCES users (username)
     )
     """)
     conn.commit()
     conn.close()
+    create_locations_table(DB_NAME)
 
 # User Authentication
-def hash_password(password):
-    """Hash a password for secure storage."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
 def register_user(username, password, role):
     """Register a new user."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                       (username, hash_password(password), role))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        return False  # Username already exists
-    finally:
-        conn.close()
-    return True
+    return auth.register_user(DB_NAME, username, password, role)
 
 def login_user(username, password):
-    """Check user credentials."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ? AND password = ?",
-                   (username, hash_password(password)))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    """Check user credentials and return a signed session token, or None."""
+    user = auth.authenticate(DB_NAME, username, password, with_role=True)
+    return auth.make_session_token(*user) if user else None
 
 # Event Management
 def add_event_to_db(name, description, date, time, location, username):
-    """Add a new event to the database."""
+    """Add a new event to the database and return its ID (False if the date is taken)."""
     # Prevent event conflict (same date)
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM events WHERE Date = ?", (date,))
+    cursor.execute("SELECT ID FROM events WHERE Date = ?", (date,))
     if cursor.fetchall():
         conn.close()
         return False  # Date already taken
-    cursor.execute("INSERT INTO events (Name, Description, Date, Time, Location, username) VALUES (?, ?, ?, ?, ?, ?)",
-                   (name, description, date, time, location, username))
+    cursor.execute("INSERT INTO events (Name, Description, Date, Time, location_id, username) VALUES (?, ?, ?, ?, ?, ?)",
+                   (name, description, date, time, intern_location(cursor, location), username))
+    event_id = cursor.lastrowid
     conn.commit()
     conn.close()
-    return True
+    return event_id
 
 def get_events_from_db(username, role):
     """Retrieve all events for a user (Admin can see all)."""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
+    query = """
+    SELECT e.ID, e.Name, e.Description, e.Date, e.Time, l.Name, e.username
+    FROM events AS e JOIN locations AS l ON l.ID = e.location_id
+    """
     if role == "Admin":
-        cursor.execute("SELECT * FROM events")
+        cursor.execute(query)
     else:
-        cursor.execute("SELECT * FROM events WHERE username = ?", (username,))
+        cursor.execute(query + "WHERE e.username = ?", (username,))
     rows = cursor.fetchall()
     conn.close()
     return rows
@@ -98,9 +90,9 @@ def update_event_in_db(event_id, name, description, date, time, location):
     cursor = conn.cursor()
     cursor.execute("""
     UPDATE events
-    SET Name = ?, Description = ?, Date = ?, Time = ?, Location = ?
+    SET Name = ?, Description = ?, Date = ?, Time = ?, location_id = ?
     WHERE ID = ?
-    """, (name, description, date, time, location, event_id))
+    """, (name, description, date, time, intern_location(cursor, location), event_id))
     conn.commit()
     conn.close()
 
@@ -112,6 +104,27 @@ def delete_event_from_db(event_id):
     conn.commit()
     conn.close()
 
+@st.cache_resource
+def prepare_database():
+    """Create the tables and run schema migrations once per server process."""
+    create_tables()
+    migrate_event_locations(DB_NAME)  # Older databases still have a free-text Location column
+
+@st.cache_resource
+def get_reminder_scheduler():
+    """Start one background reminder scheduler per server process."""
+    prepare_database()
+    scheduler = ReminderScheduler(DB_NAME, OutboxTableSink(DB_NAME))
+    scheduler.start()
+    return scheduler
+
+@st.cache_resource
+def get_calendar_cache():
+    """Share one calendar window cache per server process."""
+    prepare_database()
+    create_calendar_indexes(DB_NAME)
+    return WindowCache()
+
 # Custom CSS for styling
 CSS = """
 <style>
@@ -144,13 +157,22 @@ st.markdown(CSS, unsafe_allow_html=True)
 
 # Streamlit UI
 st.title("Event Management System")
-create_tables()  # Ensure the database tables exist
+prepare_database()  # Ensure the database tables exist
+reminders = get_reminder_scheduler()
+calendar_cache = get_calendar_cache()
 
 # Login/Registration
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
     st.session_state.username = None
     st.session_state.role = None
+    st.session_state.auth_token = None
+
+# Reruns trust the signed session token instead of querying the users table
+identity = auth.read_session_token(st.session_state.auth_token)
+st.session_state.logged_in = identity is not None
+if identity:
+    st.session_state.username, st.session_state.role = identity
 
 if not st.session_state.logged_in:
     st.sidebar.header("User Login/Registration")
@@ -175,14 +197,15 @@ if not st.session_state.logged_in:
         username = st.sidebar.text_input("Username")
         password = st.sidebar.text_input("Password", type="password")
         if st.sidebar.button("Log In"):
-            user = login_user(username, password)
-            if user:
-                st.session_state.logged_in = True
-                st.session_state.username = username
-                st.session_state.role = user[2]  # Store the role (Admin/User)
-                st.sidebar.success(f"Welcome, {username}!")
-            elif user:
-                st.sidebar.error("Invalid username or password.")
+            if username and password:
+                token = login_user(username, password)
+                if token:
+                    st.session_state.auth_token = token
+                    st.session_state.logged_in = True
+                    st.session_state.username, st.session_state.role = auth.read_session_token(token)
+                    st.sidebar.success(f"Welcome, {username}!")
+                else:
+                    st.sidebar.error("Invalid username or password.")
             else:
                 st.sidebar.error("Please fill in all fields.")
 
@@ -192,14 +215,16 @@ if st.session_state.logged_in:
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
+        st.session_state.auth_token = None
 
     # Tabs for event management
     if st.session_state.role == "Admin":
         st.header("Admin Dashboard")
-        tab1, tab2, tab3, tab4 = st.tabs(["Add Event", "View Events", "Manage Events", "Sort Events"])
+        tab1, tab2, tab3, tab4, tab_calendar = st.tabs(["Add Event", "View Events", "Manage Events", "Sort Events",
+                                                        "Calendar"])
     else:
         st.header("User Dashboard")
-        tab1, tab2 = st.tabs(["Add Event", "View Events"])
+        tab1, tab2, tab_calendar = st.tabs(["Add Event", "View Events", "Calendar"])
 
     # Add Event Tab
     with tab1:
@@ -209,9 +234,22 @@ if st.session_state.logged_in:
         date = st.date_input("Event Date")
         time = st.time_input("Event Time")
         location = st.text_input("Event Location")
+        known_locations = search_locations(DB_NAME, location) if location else []
+        if known_locations and location not in known_locations:
+            location = st.selectbox("Matching Locations", options=[location] + known_locations)
+        location_id = find_location(DB_NAME, location) if location else None
+        if location_id is not None:
+            # Warn about double-booking the venue; reads only the (location_id, Date, Time) index
+            booked = get_location_events(DB_NAME, location_id, str(date), str(date + timedelta(days=1)))
+            if booked:
+                times = ", ".join(row[2][:5] for row in booked)
+                st.warning(f"{location} already has events on {date} at {times}.")
         if st.button("Add Event"):
             if name and description and location:
-                if add_event_to_db(name, description, str(date), str(time), location, st.session_state.username):
+                event_id = add_event_to_db(name, description, str(date), str(time), location, st.session_state.username)
+                if event_id:
+                    reminders.add(event_id, name, str(date), str(time), st.session_state.username)
+                    calendar_cache.clear()
                     st.success("Event added successfully!")
                 else:
                     st.error("Event already exists on this date. Choose another date.")
@@ -251,9 +289,13 @@ if st.session_state.logged_in:
                 # Update or delete the event
                 if st.button("Update Event"):
                     update_event_in_db(selected_event_id, name, description, str(date), str(time), location)
+                    reminders.update(selected_event_id, name, str(date), str(time), selected_event[6])
+                    calendar_cache.clear()
                     st.success("Event updated successfully!")
                 if st.button("Delete Event"):
                     delete_event_from_db(selected_event_id)
+                    reminders.remove(selected_event_id)
+                    calendar_cache.clear()
                     st.warning("Event deleted successfully!")
             else :
                     st.info("No events found. Add some events first.")
@@ -270,4 +312,10 @@ if st.session_state.logged_in:
                 st.dataframe(sorted_df.drop("Username", axis=1))
             else:
                 st.info("No events to sort. Add some events first.")
+
+    # Calendar Tab
+    with tab_calendar:
+        owner = None if st.session_state.role == "Admin" else st.session_state.username
+        show_calendar(lambda start, end: fetch_window(DB_NAME, start, end, owner),
+                      cache=calendar_cache, cache_key=owner)
 #streamlit run C:\Users\Ganesh\PycharmProjects\pythonProject\ems.py
\ No newline at end of file
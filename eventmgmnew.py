@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
-from datetime import datetime
-import hashlib
+from datetime import datetime, timedelta
+import auth
+from reminders import ReminderScheduler, OutboxTableSink
+from locations import (create_locations_table, find_location, get_location_events, intern_location,
+                       migrate_event_locations, search_locations)
+from calendar_views import WindowCache, create_calendar_indexes, fetch_window, show_calendar
 
 # Database setup
 DB_NAME = "event_management.db"
@@ -26,56 +30,47 @@ def create_tables():
         Description TEXT NOT NULL,
         Date TEXT NOT NULL,
         Time TEXT NOT NULL,
-        Location TEXT NOT NULL,
+        location_id INTEGER NOT NULL,
         username TEXT NOT NULL,
+        FOREIGN KEY (location_id) REFERENCES locations (ID),
         FOREIGN KEY (username) REFERENCES users (username)
     )
     """)
     conn.commit()
     conn.close()
+    create_locations_table(DB_NAME)
 
 # User Authentication
-def hash_password(password):
-    """Hash a password for secure storage."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
 def register_user(username, password):
     """Register a new user."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hash_password(password)))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        return False  # Username already exists
-    finally:
-        conn.close()
-    return True
+    return auth.register_user(DB_NAME, username, password)
 
 def login_user(username, password):
-    """Check user credentials."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, hash_password(password)))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    """Check user credentials and return a signed session token, or None."""
+    user = auth.authenticate(DB_NAME, username, password)
+    return auth.make_session_token(*user) if user else None
 
 # Event Management
 def add_event_to_db(name, description, date, time, location, username):
-    """Add a new event to the database."""
+    """Add a new event to the database and return its ID."""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("INSERT INTO events (Name, Description, Date, Time, Location, username) VALUES (?, ?, ?, ?, ?, ?)",
-                   (name, description, date, time, location, username))
+    cursor.execute("INSERT INTO events (Name, Description, Date, Time, location_id, username) VALUES (?, ?, ?, ?, ?, ?)",
+                   (name, description, date, time, intern_location(cursor, location), username))
+    event_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    return event_id
 
 def get_events_from_db(username):
     """Retrieve all events for a specific user."""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM events WHERE username = ?", (username,))
+    cursor.execute("""
+    SELECT e.ID, e.Name, e.Description, e.Date, e.Time, l.Name, e.username
+    FROM events AS e JOIN locations AS l ON l.ID = e.location_id
+    WHERE e.username = ?
+    """, (username,))
     rows = cursor.fetchall()
     conn.close()
     return rows
@@ -86,9 +81,9 @@ def update_event_in_db(event_id, name, description, date, time, location):
     cursor = conn.cursor()
     cursor.execute("""
     UPDATE events
-    SET Name = ?, Description = ?, Date = ?, Time = ?, Location = ?
+    SET Name = ?, Description = ?, Date = ?, Time = ?, location_id = ?
     WHERE ID = ?
-    """, (name, description, date, time, location, event_id))
+    """, (name, description, date, time, intern_location(cursor, location), event_id))
     conn.commit()
     conn.close()
 
@@ -104,6 +99,27 @@ def sort_events_by_date(events):
     """Sort events by date."""
     return sorted(events, key=lambda x: datetime.strptime(x[3], "%Y-%m-%d"))
 
+@st.cache_resource
+def prepare_database():
+    """Create the tables and run schema migrations once per server process."""
+    create_tables()
+    migrate_event_locations(DB_NAME)  # Older databases still have a free-text Location column
+
+@st.cache_resource
+def get_reminder_scheduler():
+    """Start one background reminder scheduler per server process."""
+    prepare_database()
+    scheduler = ReminderScheduler(DB_NAME, OutboxTableSink(DB_NAME))
+    scheduler.start()
+    return scheduler
+
+@st.cache_resource
+def get_calendar_cache():
+    """Share one calendar window cache per server process."""
+    prepare_database()
+    create_calendar_indexes(DB_NAME)
+    return WindowCache()
+
 # Custom CSS for styling
 CSS = """
 <style>
@@ -136,12 +152,21 @@ st.markdown(CSS, unsafe_allow_html=True)
 
 # Streamlit UI
 st.title("Event Management System")
-create_tables()  # Ensure the database tables exist
+prepare_database()  # Ensure the database tables exist
+reminders = get_reminder_scheduler()
+calendar_cache = get_calendar_cache()
 
 # Login/Registration
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
     st.session_state.username = None
+    st.session_state.auth_token = None
+
+# Reruns trust the signed session token instead of querying the users table
+identity = auth.read_session_token(st.session_state.auth_token)
+st.session_state.logged_in = identity is not None
+if identity:
+    st.session_state.username = identity[0]
 
 if not st.session_state.logged_in:
     st.sidebar.header("User Login/Registration")
@@ -166,7 +191,9 @@ if not st.session_state.logged_in:
         password = st.sidebar.text_input("Password", type="password")
         if st.sidebar.button("Log In"):
             if username and password:
-                if login_user(username, password):
+                token = login_user(username, password)
+                if token:
+                    st.session_state.auth_token = token
                     st.session_state.logged_in = True
                     st.session_state.username = username
                     st.sidebar.success(f"Welcome, {username}!")
@@ -180,9 +207,10 @@ if st.session_state.logged_in:
     if st.sidebar.button("Log Out"):
         st.session_state.logged_in = False
         st.session_state.username = None
+        st.session_state.auth_token = None
 
     # Tabs for event management
-    tab1, tab2, tab3, tab4 = st.tabs(["Add Event", "View Events", "Manage Events", "Sort Events"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Add Event", "View Events", "Manage Events", "Sort Events", "Calendar"])
 
     # Tab 1: Add Event
     with tab1:
@@ -192,9 +220,21 @@ if st.session_state.logged_in:
         date = st.date_input("Event Date")
         time = st.time_input("Event Time")
         location = st.text_input("Event Location")
+        known_locations = search_locations(DB_NAME, location) if location else []
+        if known_locations and location not in known_locations:
+            location = st.selectbox("Matching Locations", options=[location] + known_locations)
+        location_id = find_location(DB_NAME, location) if location else None
+        if location_id is not None:
+            # Warn about double-booking the venue; reads only the (location_id, Date, Time) index
+            booked = get_location_events(DB_NAME, location_id, str(date), str(date + timedelta(days=1)))
+            if booked:
+                times = ", ".join(row[2][:5] for row in booked)
+                st.warning(f"{location} already has events on {date} at {times}.")
         if st.button("Add Event"):
             if name and description and location:
-                add_event_to_db(name, description, str(date), str(time), location, st.session_state.username)
+                event_id = add_event_to_db(name, description, str(date), str(time), location, st.session_state.username)
+                reminders.add(event_id, name, str(date), str(time), st.session_state.username)
+                calendar_cache.clear()
                 st.success("Event added successfully!")
             else:
                 st.error("Please fill in all the required fields.")
@@ -231,9 +271,13 @@ if st.session_state.logged_in:
             # Update or delete the event
             if st.button("Update Event"):
                 update_event_in_db(selected_event_id, name, description, str(date), str(time), location)
+                reminders.update(selected_event_id, name, str(date), str(time), st.session_state.username)
+                calendar_cache.clear()
                 st.success("Event updated successfully!")
             if st.button("Delete Event"):
                 delete_event_from_db(selected_event_id)
+                reminders.remove(selected_event_id)
+                calendar_cache.clear()
                 st.warning("Event deleted successfully!")
         else:
             st.info("No events found. Add some events first.")
@@ -248,4 +292,11 @@ if st.session_state.logged_in:
             st.dataframe(sorted_df.drop("Username", axis=1))
         else:
             st.info("No events to sort. Add some events first.")
+
+    # Tab 5: Calendar
+    with tab5:
+        st.header("Calendar")
+        username = st.session_state.username
+        show_calendar(lambda start, end: fetch_window(DB_NAME, start, end, username),
+                      cache=calendar_cache, cache_key=username)
 # streamlit run C:\Users\Ganesh\PycharmProjects\pythonProject\eventmgmnew.py
@@ -0,0 +1,213 @@
+"""Concurrent-session load test for the Streamlit event management apps.
+
+Drives many simulated sessions through Streamlit's headless AppTest runner.
+AppTest is not thread-safe, so every session runs in its own process, and
+the sessions wait at a barrier so they all start at the same time. A session
+that crashes records an error for the interaction it was on and keeps the
+timings it already has. Every app gets its own temporary database directory,
+so the runs are fully offline and never touch the real event_management.db.
+
+    python loadtest.py --sessions 5 10 20 --actions 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from multiprocessing import Barrier, Pool
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+APPS = ["ems.py", "eventmgmnew.py"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Relative weights of the scripted interactions after login
+ACTION_WEIGHTS = {
+    "add": 3,
+    "view": 3,
+    "sort": 1,
+    "update": 2,
+    "delete": 1,
+}
+START_TIMEOUT = 120  # Seconds to wait for every session process to be ready
+
+_start_barrier = None  # Set in each session process by init_session_process
+
+
+def find_widget(widgets, label, last=False):
+    """Return the first (or last) widget with the given label, or None."""
+    matches = [w for w in widgets if w.label == label]
+    if not matches:
+        return None
+    return matches[-1] if last else matches[0]
+
+
+def timed_run(at, interaction, results):
+    """Rerun the script, recording latency and whether it raised."""
+    start = time.perf_counter()
+    try:
+        at.run()
+    except RuntimeError as exc:  # AppTest raises on rerun timeout
+        results.append((interaction, time.perf_counter() - start, "timeout"))
+        return False
+    elapsed = time.perf_counter() - start
+    messages = [e.message for e in at.exception]
+    if any("locked" in m for m in messages):
+        status = "locked"
+    elif messages:
+        status = "error"
+    else:
+        status = "ok"
+    results.append((interaction, elapsed, status))
+    return status == "ok"
+
+
+def register(at, username, password, results):
+    """Register a fresh user, as an Admin where roles exist."""
+    at.run()
+    at.sidebar.radio[0].set_value("Register")
+    at.run()
+    at.sidebar.text_input[0].input(username)
+    at.sidebar.text_input[1].input(password)
+    role = find_widget(at.sidebar.radio, "Role")
+    if role is not None:
+        role.set_value("Admin")
+    find_widget(at.sidebar.button, "Register").click()
+    timed_run(at, "register", results)
+
+
+def login(at, username, password, results):
+    """Log in as a registered user."""
+    at.sidebar.radio[0].set_value("Login")
+    at.run()
+    at.sidebar.text_input[0].input(username)
+    at.sidebar.text_input[1].input(password)
+    find_widget(at.sidebar.button, "Log In").click()
+    timed_run(at, "login", results)
+
+
+def add_event(at, rng, results):
+    """Fill in the Add Event form with a random date and submit it."""
+    find_widget(at.text_input, "Event Name").input(f"Event {rng.randrange(10 ** 6)}")
+    find_widget(at.text_area, "Event Description").input("Load test event")
+    find_widget(at.date_input, "Event Date").set_value(date.today() + timedelta(days=rng.randrange(3650)))
+    find_widget(at.text_input, "Event Location").input(rng.choice(["Hall A", "Hall B", "Auditorium"]))
+    find_widget(at.button, "Add Event").click()
+    timed_run(at, "add", results)
+
+
+def manage_event(at, rng, interaction, results):
+    """Select a random event in the Manage tab and update or delete it."""
+    selector = find_widget(at.selectbox, "Select an Event ID to Manage")
+    if selector is None or not selector.options:
+        return
+    selector.set_value(int(rng.choice(selector.options)))
+    at.run()
+    if interaction == "update":
+        find_widget(at.text_input, "Event Name", last=True).input(f"Updated {rng.randrange(10 ** 6)}")
+        find_widget(at.button, "Update Event").click()
+    else:
+        find_widget(at.button, "Delete Event").click()
+    timed_run(at, interaction, results)
+
+
+def init_session_process(db_dir, barrier):
+    """Run the session process in the app's database directory."""
+    global _start_barrier
+    os.chdir(db_dir)
+    _start_barrier = barrier
+
+
+def run_session(task):
+    """Run one simulated user session and return its interaction timings.
+
+    An exception (e.g. a widget missing after an error rerun) ends the
+    session with an error for the current interaction, and the timings
+    recorded so far are still returned.
+    """
+    app, session_id, actions, seed, timeout = task
+    rng = random.Random(seed)
+    results = []
+    username = f"load_{session_id}"
+    interaction = "register"
+    start = time.perf_counter()
+    try:
+        at = AppTest.from_file(os.path.join(HERE, app), default_timeout=timeout)
+        # Holding each process here also keeps the pool from giving it a second session
+        _start_barrier.wait(START_TIMEOUT)
+        start = time.perf_counter()
+        register(at, username, "secret", results)
+        interaction = "login"
+        start = time.perf_counter()
+        login(at, username, "secret", results)
+        if not at.session_state.logged_in:
+            return results
+
+        names = list(ACTION_WEIGHTS)
+        weights = list(ACTION_WEIGHTS.values())
+        for interaction in rng.choices(names, weights=weights, k=actions):
+            start = time.perf_counter()
+            if interaction == "add":
+                add_event(at, rng, results)
+            elif interaction in ("update", "delete"):
+                manage_event(at, rng, interaction, results)
+            else:
+                # View and Sort are rendered from the database on every rerun
+                timed_run(at, interaction, results)
+    except Exception:
+        results.append((interaction, time.perf_counter() - start, "error"))
+    return results
+
+
+def run_app(app, sessions, actions, timeout, seed):
+    """Run the given number of simultaneous sessions against one app, one process each."""
+    with tempfile.TemporaryDirectory() as db_dir:
+        tasks = [(app, i, actions, seed + i, timeout) for i in range(sessions)]
+        barrier = Barrier(sessions)
+        start = time.perf_counter()
+        with Pool(sessions, initializer=init_session_process, initargs=(db_dir, barrier)) as pool:
+            session_results = pool.map(run_session, tasks, chunksize=1)
+        wall = time.perf_counter() - start
+    return [r for results in session_results for r in results], wall
+
+
+def summarize(app, sessions, results, wall):
+    """Print latency percentiles, throughput and error rates for one run."""
+    print(f"\n== {app}: {sessions} sessions, {len(results)} interactions in {wall:.1f}s "
+          f"({len(results) / wall:.1f} interactions/s) ==")
+    print(f"{'interaction':<12}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+          f"{'max ms':>10}{'locked':>8}{'errors':>8}")
+    for interaction in ["register", "login"] + list(ACTION_WEIGHTS):
+        rows = [r for r in results if r[0] == interaction]
+        if not rows:
+            continue
+        latencies = np.array([r[1] for r in rows]) * 1000
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        locked = sum(1 for r in rows if r[2] == "locked")
+        errors = sum(1 for r in rows if r[2] in ("error", "timeout"))
+        print(f"{interaction:<12}{len(rows):>7}{p50:>10.1f}{p90:>10.1f}{p99:>10.1f}"
+              f"{latencies.max():>10.1f}{locked:>8}{errors:>8}")
+    locked = sum(1 for r in results if r[2] == "locked")
+    print(f"lock-error rate: {locked / max(len(results), 1):.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Streamlit event apps.")
+    parser.add_argument("--apps", nargs="+", default=APPS, help="App scripts to test")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[5, 10, 20],
+                        help="Simultaneous session counts to step through")
+    parser.add_argument("--actions", type=int, default=20, help="Interactions per session after login")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the scripted mixes")
+    args = parser.parse_args()
+
+    for app in args.apps:
+        for sessions in args.sessions:
+            results, wall = run_app(app, sessions, args.actions, args.timeout, args.seed)
+            summarize(app, sessions, results, wall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Interned event locations.
+
+Each distinct location is stored once in a locations table, and events refer
+to it by integer ID. Names are normalized (surrounding and repeated
+whitespace removed) and matched case-insensitively through name_key. That
+unique key also serves prefix searches for the Add Event autocomplete.
+"""
+import sqlite3
+import sys
+
+MIGRATION_BATCH = 1000  # Events converted per transaction
+MIGRATION_LOCK_TIMEOUT = 300  # Seconds to wait while another process holds a migration step
+LOCATION_ID_COLUMN = "location_id INTEGER REFERENCES locations (ID)"  # As added to older tables
+
+
+def normalize_location(name):
+    """Return the display name and the case-insensitive lookup key for a location."""
+    display = " ".join(name.split())
+    return display, display.casefold()
+
+
+def create_locations_table(db_name):
+    """Create the locations table."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS locations (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        Name TEXT NOT NULL,
+        name_key TEXT NOT NULL UNIQUE
+    )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def intern_location(cursor, name):
+    """Return the ID for a location name, adding it if it is new.
+
+    Takes a cursor so the lookup joins the caller's transaction.
+    """
+    display, key = normalize_location(name)
+    cursor.execute("INSERT OR IGNORE INTO locations (Name, name_key) VALUES (?, ?)", (display, key))
+    cursor.execute("SELECT ID FROM locations WHERE name_key = ?", (key,))
+    return cursor.fetchone()[0]
+
+
+def _event_columns(cursor):
+    cursor.execute("PRAGMA table_info(events)")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _intern_batch(cursor, rows):
+    for event_id, location in rows:
+        cursor.execute("UPDATE events SET location_id = ? WHERE ID = ?", (intern_location(cursor, location), event_id))
+
+
+def _rebuild_events_not_null(cursor):
+    """Rebuild the events table so location_id is NOT NULL, as create_tables declares it.
+
+    SQLite can't add NOT NULL to an existing column, so the table is copied
+    into a new one with the same schema, indexes and AUTOINCREMENT counter.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'events'")
+    table_sql = cursor.fetchone()[0]
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'events' AND sql IS NOT NULL")
+    index_sqls = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'")
+    row = cursor.fetchone()
+    table_sql = table_sql.replace("CREATE TABLE events", "CREATE TABLE events_rebuilt", 1)
+    cursor.execute(table_sql.replace(LOCATION_ID_COLUMN, "location_id INTEGER NOT NULL REFERENCES locations (ID)"))
+    cursor.execute("INSERT INTO events_rebuilt SELECT * FROM events")
+    cursor.execute("DROP TABLE events")
+    cursor.execute("ALTER TABLE events_rebuilt RENAME TO events")
+    if row is not None:
+        # Keep deleted IDs retired; reminder_deliveries is keyed by event ID
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'events'", (row[0],))
+    for index_sql in index_sqls:
+        cursor.execute(index_sql)
+
+
+def migrate_event_locations(db_name, batch_size=MIGRATION_BATCH):
+    """Move events from the free-text Location column to location_id.
+
+    Rows are converted in ID order, one batch per transaction, so an
+    interrupted migration picks up where it stopped. Location is dropped once
+    every row has an ID, and the table is rebuilt with location_id NOT NULL.
+Each schema change runs under BEGIN IMMEDIATE and
+    re-checks the columns first, so concurrent callers (other server
+    processes) wait for each other instead of racing. Safe to call on every
+    start, but a large database takes a while: run `python locations.py DB`
+    before starting the apps.
+    """
+    conn = sqlite3.connect(db_name, timeout=MIGRATION_LOCK_TIMEOUT, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    columns = _event_columns(cursor)
+    if "Location" in columns and "location_id" not in columns:
+        cursor.execute(f"ALTER TABLE events ADD COLUMN {LOCATION_ID_COLUMN}")
+    cursor.execute("COMMIT")
+
+    if "Location" in columns:
+        last_id = 0
+        while True:
+            cursor.execute("BEGIN IMMEDIATE")
+            if "Location" not in _event_columns(cursor):
+                cursor.execute("COMMIT")  # Another process finished the migration
+                break
+            cursor.execute("""
+            SELECT ID, Location FROM events
+            WHERE ID > ? AND location_id IS NULL
+            ORDER BY ID
+            LIMIT ?
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                # Convert anything written behind the cursor, then drop the column
+                cursor.execute("SELECT ID, Location FROM events WHERE location_id IS NULL")
+                _intern_batch(cursor, cursor.fetchall())
+                cursor.execute("ALTER TABLE events DROP COLUMN Location")
+                _rebuild_events_not_null(cursor)
+                cursor.execute("COMMIT")
+                break
+            _intern_batch(cursor, rows)
+            cursor.execute("COMMIT")
+            last_id = rows[-1][0]
+    # Covers the per-location calendar query, so it never reads the table rows
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_location_start ON events (location_id, Date, Time)")
+    conn.close()
+
+
+def search_locations(db_name, prefix, limit=10):
+    """Return known location names starting with prefix, ignoring case."""
+    _, key = normalize_location(prefix)
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    # A range on the unique name_key index instead of LIKE, which can't use it
+    cursor.execute("""
+    SELECT Name FROM locations
+    WHERE name_key >= ? AND name_key < ?
+    ORDER BY name_key
+    LIMIT ?
+    """, (key, key + "\U0010ffff", limit))
+    names = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return names
+
+
+def find_location(db_name, name):
+    """Return the ID of a known location, ignoring case and spacing, or None."""
+    _, key = normalize_location(name)
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("SELECT ID FROM locations WHERE name_key = ?", (key,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def get_location_events(db_name, location_id, start_date, end_date):
+    """Return (ID, Date, Time) for events at a location with start_date <= Date < end_date."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT ID, Date, Time FROM events
+    WHERE location_id = ? AND Date >= ? AND Date < ?
+    ORDER BY Date, Time
+    """, (location_id, start_date, end_date))
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        create_locations_table(path)
+        migrate_event_locations(path)
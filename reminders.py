@@ -0,0 +1,310 @@
+"""Background reminder scheduler for upcoming events.
+
+The scheduler keeps a min-heap of upcoming event start times. Rows are loaded
+a page at a time from an indexed (Date, Time) query, so a tick only pops the
+reminders that are due instead of scanning the events table. The apps keep the
+heap current by calling add, update and remove alongside their own writes.
+Writes from other processes (the other app, consolidate.py) are caught by
+re-checking each due batch against the database before it is sent, and by
+reloading the upcoming events every RESCAN_SECONDS.
+"""
+import heapq
+import json
+import logging
+import smtplib
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+REMINDER_LEAD = timedelta(hours=1)  # How long before an event its reminder fires
+LOAD_BATCH = 500  # Events loaded into the heap per indexed query
+SEND_BATCH = 50  # Reminders handed to the sink at once
+TICK_SECONDS = 1.0
+RESCAN_SECONDS = 60  # How often the cursor is reset to pick up other processes' inserts
+END_OF_TIME = "9999-12-31 23:59:59"
+
+logger = logging.getLogger(__name__)
+
+
+def start_key(date, time):
+    """Build a sortable 'YYYY-MM-DD HH:MM:SS' key from an event's Date and Time."""
+    return f"{date} {time}"
+
+
+def now_key(now):
+    """Format a datetime the same way as start_key."""
+    return now.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def create_reminder_tables(db_name):
+    """Create the start-time index and the delivery log used by the scheduler."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_start ON events (Date, Time)")
+    # One row per delivered reminder; a rescheduled event gets a new reminder
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS reminder_deliveries (
+        event_id INTEGER NOT NULL,
+        Date TEXT NOT NULL,
+        Time TEXT NOT NULL,
+        delivered_at TEXT NOT NULL,
+        PRIMARY KEY (event_id, Date, Time)
+    )
+    """)
+    conn.commit()
+    conn.close()
+
+
+# Reminder sinks. Each takes a list of reminder dicts and raises on failure,
+# in which case the scheduler keeps the reminders and retries on a later tick.
+
+class OutboxFileSink:
+    """Append reminders as JSON lines to a local outbox file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, reminders):
+        with open(self.path, "a", encoding="utf-8") as outbox:
+            for reminder in reminders:
+                outbox.write(json.dumps(reminder) + "\n")
+
+
+class OutboxTableSink:
+    """Insert reminders into a reminder_outbox table in one transaction."""
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        conn = sqlite3.connect(db_name)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS reminder_outbox (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            Name TEXT NOT NULL,
+            Start TEXT NOT NULL,
+            username TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """)
+        conn.commit()
+        conn.close()
+
+    def send(self, reminders):
+        created_at = now_key(datetime.now())
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            conn.executemany(
+                "INSERT INTO reminder_outbox (event_id, Name, Start, username, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(r["event_id"], r["name"], r["start"], r["username"], created_at) for r in reminders])
+        conn.close()
+
+
+class SMTPSink:
+    """Send reminders as emails through a local SMTP server (e.g. `python -m aiosmtpd -n`)."""
+
+    def __init__(self, host="localhost", port=1025, sender="events@localhost", domain="localhost"):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.domain = domain
+
+    def send(self, reminders):
+        with smtplib.SMTP(self.host, self.port) as smtp:
+            for reminder in reminders:
+                message = EmailMessage()
+                message["From"] = self.sender
+                message["To"] = f"{reminder['username']}@{self.domain}"
+                message["Subject"] = f"Reminder: {reminder['name']} at {reminder['start']}"
+                message.set_content(f"Your event '{reminder['name']}' starts at {reminder['start']}.")
+                smtp.send_message(message)
+
+
+class ReminderScheduler:
+    """Fire reminders for upcoming events from a lazily filled min-heap."""
+
+    def __init__(self, db_name, sink, lead=REMINDER_LEAD, load_batch=LOAD_BATCH,
+                 send_batch=SEND_BATCH, tick_seconds=TICK_SECONDS, rescan_seconds=RESCAN_SECONDS):
+        self.db_name = db_name
+        self.sink = sink
+        self.lead = lead
+        self.load_batch = load_batch
+        self.send_batch = send_batch
+        self.tick_seconds = tick_seconds
+        self.rescan_seconds = rescan_seconds
+        self._heap = []  # (start, event_id, name, username)
+        self._scheduled = {}  # event_id -> its live heap entry; anything else in the heap is stale
+        # Keyset cursor of the last row loaded. Every pending event at or
+        # before it is in the heap; later ones are still in the database.
+        self._cursor = (now_key(datetime.now()), 0)
+        self._rescanned_at = time.monotonic()
+        self._edits = 0  # Bumped by add and remove, so a page fetched meanwhile is refetched
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        create_reminder_tables(db_name)
+
+    def _fetch_page(self, after):
+        """Return the next page of undelivered events after the (start, ID) cursor."""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        start, last_id = after
+        date, time = start.split(" ")
+        cursor.execute("""
+        SELECT ID, Name, Date, Time, username FROM events AS e
+        WHERE (Date, Time, ID) > (?, ?, ?)
+          AND NOT EXISTS (SELECT 1 FROM reminder_deliveries AS d
+                          WHERE d.event_id = e.ID AND d.Date = e.Date AND d.Time = e.Time)
+        ORDER BY Date, Time, ID
+        LIMIT ?
+        """, (date, time, last_id, self.load_batch))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def _load_until(self, horizon):
+        """Load pages into the heap until the cursor passes horizon.
+
+        Pages are read outside the lock, so add, update and remove never wait
+        on the scheduler's queries. A page that raced one of them is refetched.
+        """
+        while True:
+            with self._lock:
+                after, edits = self._cursor, self._edits
+            if after[0] > horizon:
+                return
+            rows = self._fetch_page(after)
+            with self._lock:
+                if self._edits != edits or self._cursor != after:
+                    continue
+                for event_id, name, date, time, username in rows:
+                    self._push(event_id, name, start_key(date, time), username)
+                if len(rows) < self.load_batch:
+                    self._cursor = (END_OF_TIME, 0)  # Everything left is in the heap
+                else:
+                    self._cursor = (start_key(rows[-1][2], rows[-1][3]), rows[-1][0])
+
+    def _push(self, event_id, name, start, username):
+        entry = (start, event_id, name, username)
+        if self._scheduled.get(event_id) == entry:
+            return  # Already in the heap, e.g. reloaded by a rescan
+        self._scheduled[event_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _delivered(self, event_id, date, time):
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM reminder_deliveries WHERE event_id = ? AND Date = ? AND Time = ?",
+                       (event_id, date, time))
+        delivered = cursor.fetchone() is not None
+        conn.close()
+        return delivered
+
+    def add(self, event_id, name, date, time, username):
+        """Schedule a reminder for a newly added event."""
+        start = start_key(date, time)
+        if self._delivered(event_id, date, time):
+            return  # Already reminded for this start time, e.g. an update that only renamed it
+        with self._lock:
+            self._edits += 1
+            # Events past the cursor are picked up by a later page load
+            if now_key(datetime.now()) < start and (start, event_id) <= self._cursor:
+                self._push(event_id, name, start, username)
+
+    def update(self, event_id, name, date, time, username):
+        """Reschedule the reminder for an edited event."""
+        self.remove(event_id)
+        self.add(event_id, name, date, time, username)
+
+    def remove(self, event_id):
+        """Cancel the reminder for a deleted event; its heap entry goes stale."""
+        with self._lock:
+            self._edits += 1
+            self._scheduled.pop(event_id, None)
+
+    def _still_current(self, due):
+        """Drop due entries whose event was deleted or rescheduled by another process."""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT ID, Date, Time FROM events WHERE ID IN ({', '.join('?' * len(due))})",
+                       [event_id for _, event_id, _, _ in due])
+        starts = {event_id: start_key(date, time) for event_id, date, time in cursor.fetchall()}
+        conn.close()
+        current = [entry for entry in due if starts.get(entry[1]) == entry[0]]
+        with self._lock:
+            for entry in due:
+                if entry not in current and self._scheduled.get(entry[1]) == entry:
+                    del self._scheduled[entry[1]]  # A rescan loads the new start time, if any
+        return current
+
+    def tick(self, now=None):
+        """Deliver one batch of due reminders and return how many were sent."""
+        now = now or datetime.now()
+        horizon = now_key(now + self.lead)
+        if time.monotonic() - self._rescanned_at >= self.rescan_seconds:
+            # Reload from now, so events other processes added behind the cursor are found
+            with self._lock:
+                self._cursor = (now_key(now), 0)
+            self._rescanned_at = time.monotonic()
+        self._load_until(horizon)
+
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= horizon and len(due) < self.send_batch:
+                entry = heapq.heappop(self._heap)
+                if self._scheduled.get(entry[1]) == entry and entry not in due:
+                    due.append(entry)
+        if not due:
+            return 0
+
+        try:
+            current = self._still_current(due)
+            if current:
+                self.sink.send([{"event_id": event_id, "name": name, "start": start, "username": username}
+                                for start, event_id, name, username in current])
+                self._record_deliveries(current)
+        except Exception:
+            # Keep the batch for the next tick; delivery is at-least-once
+            with self._lock:
+                for entry in due:
+                    if self._scheduled.get(entry[1]) == entry:
+                        heapq.heappush(self._heap, entry)
+            raise
+
+        with self._lock:
+            for entry in current:
+                if self._scheduled.get(entry[1]) == entry:
+                    del self._scheduled[entry[1]]
+        return len(due)
+
+    def _record_deliveries(self, due):
+        delivered_at = now_key(datetime.now())
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO reminder_deliveries (event_id, Date, Time, delivered_at) VALUES (?, ?, ?, ?)",
+                [(event_id, *start.split(" "), delivered_at) for start, event_id, _, _ in due])
+        conn.close()
+
+    def _run(self):
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                while self.tick() == self.send_batch:
+                    pass
+            except Exception:
+                # e.g. the database is locked by a session's write; retry next tick
+                logger.exception("Reminder tick failed")
+
+    def start(self):
+        """Start delivering reminders on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None